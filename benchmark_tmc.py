@@ -3,22 +3,35 @@
 STRESS BENCHMARK
 TMC vs ChromaDB (100k memories)
 Real-world, connection-safe, batch-safe
+
+ChromaDB ingests and queries the same precomputed hash-embedding matrix
+as the other backends (see benchmark_comprehensive.py), so its default
+embedding model is never loaded and retrieval latency is vector search
+only. Embedding cost is reported as its own optional phase.
+
+The comparison is asymmetric: TMC latency still includes the HTTP round
+trip and the server embedding the query, while ChromaDB runs in-process.
 """
 
 import time
 import statistics
 import json
+import numpy as np
 import requests
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+from benchmark_comprehensive import simple_hash_embed
 
 # ---------------- CONFIG ----------------
 
 TMC_BASE_URL = "http://localhost:8000"
 TOTAL_MEMORIES = 100_000
-CHROMA_MAX_BATCH = 5000     # < 5461 hard limit
+CHROMA_MAX_BATCH = 5000     # fallback if the client can't report its limit
+CHROMA_SPACE = "cosine"     # hnsw:space - "cosine", "l2" or "ip"
 TMC_BATCH = 100             # HTTP-safe chunk
 RETRIEVAL_ITERS = 200
 K = 5
+MEASURE_EMBEDDING = True    # report embedding cost as a separate phase
 
 TEST_TEXT = "Artificial intelligence systems benefit from structured memory."
 
@@ -38,6 +51,43 @@ TEST_QUERIES = [
 ]
 
 
+def embed_matrix(texts: List[str]) -> np.ndarray:
+    """Stack hash embeddings into an (n, dim) float32 matrix"""
+    return np.vstack([simple_hash_embed(t) for t in texts]).astype(np.float32)
+
+
+def embed_memories(memories) -> Tuple[np.ndarray, Optional[Dict]]:
+    """Build the shared embedding matrix once; with MEASURE_EMBEDDING also
+    return its bulk time and per-query embedding latency"""
+    print(f"\n🧮 Embedding {len(memories)} memories...")
+    # perf_counter: time.time() ticks every ~15.6ms on Windows before 3.13
+    start = time.perf_counter()
+    embeddings = embed_matrix([t for t, _ in memories])
+    dt = time.perf_counter() - start
+    print(f"✅ Embedded in {dt:.2f}s ({len(memories)/dt:.0f} ops/s)")
+
+    if not MEASURE_EMBEDDING:
+        return embeddings, None
+
+    lat = []
+    loop_start = time.perf_counter()
+    for i in range(RETRIEVAL_ITERS):
+        q = TEST_QUERIES[i % len(TEST_QUERIES)]
+        t0 = time.perf_counter()
+        simple_hash_embed(q)
+        lat.append((time.perf_counter() - t0) * 1000)
+    loop_time = time.perf_counter() - loop_start
+
+    stats = {
+        "bulk_time": dt,
+        "bulk_ops_per_sec": len(memories) / dt,
+        # Loop total / iterations: robust where single samples near timer resolution
+        "query_avg_ms": loop_time * 1000 / RETRIEVAL_ITERS,
+        "query": summarize(lat),
+    }
+    return embeddings, stats
+
+
 # ================= TMC =================
 
 class TMCBenchmark:
@@ -85,20 +135,32 @@ class ChromaBenchmark:
     def __init__(self):
         import chromadb
         self.client = chromadb.Client()
-        self.collection = self.client.create_collection("stress_benchmark")
+        # embedding_function=None: vectors are always supplied, never inferred
+        self.collection = self.client.create_collection(
+            "stress_benchmark",
+            embedding_function=None,
+            metadata={"hnsw:space": CHROMA_SPACE}
+        )
+        # get_max_batch_size() on current clients, max_batch_size on 0.4.x
+        if hasattr(self.client, "get_max_batch_size"):
+            self.batch_size = self.client.get_max_batch_size()
+        else:
+            self.batch_size = getattr(self.client, "max_batch_size", CHROMA_MAX_BATCH)
         self.name = "ChromaDB"
 
-    def setup(self, memories):
-        print(f"\n📝 Loading {len(memories)} memories into ChromaDB...")
+    def setup(self, memories, embeddings: np.ndarray):
+        print(f"\n📝 Loading {len(memories)} memories into ChromaDB "
+              f"(batch={self.batch_size}, space={CHROMA_SPACE})...")
         start = time.time()
 
-        for i in range(0, len(memories), CHROMA_MAX_BATCH):
-            batch = memories[i:i + CHROMA_MAX_BATCH]
+        for i in range(0, len(memories), self.batch_size):
+            batch = memories[i:i + self.batch_size]
             docs = [t for t, _ in batch]
             metas = [{"importance": imp} for _, imp in batch]
             ids = [f"mem_{i+j}" for j in range(len(batch))]
 
             self.collection.add(
+                embeddings=embeddings[i:i + len(batch)].tolist(),  # 0.4.x rejects ndarrays
                 documents=docs,
                 metadatas=metas,
                 ids=ids
@@ -108,12 +170,13 @@ class ChromaBenchmark:
         print(f"✅ Loaded in {dt:.2f}s ({len(memories)/dt:.0f} ops/s)")
         return dt
 
-    def benchmark(self):
+    def benchmark(self, query_embeddings: np.ndarray):
+        queries = query_embeddings.tolist()
         lat = []
         for i in range(RETRIEVAL_ITERS):
-            q = TEST_QUERIES[i % len(TEST_QUERIES)]
+            q = queries[i % len(queries)]
             t0 = time.time()
-            self.collection.query(query_texts=[q], n_results=K)
+            self.collection.query(query_embeddings=[q], n_results=K)
             lat.append((time.time() - t0) * 1000)
 
         return summarize(lat)
@@ -141,8 +204,24 @@ def print_results(results):
     for name, r in results.items():
         print(f"{name:<12} {r['mean']:<12.2f} {r['median']:<12.2f} {r['p95']:<12.2f} {r['p99']:<12.2f}")
 
-    speedup = results["ChromaDB"]["mean"] / results["TMC"]["mean"]
-    print(f"\n🚀 TMC is **{speedup:.1f}x faster** than ChromaDB (mean latency)")
+    ratio = results["ChromaDB"]["mean"] / results["TMC"]["mean"]
+    print(f"\nChromaDB/TMC mean latency ratio: {ratio:.2f}")
+    if ratio >= 1:
+        print(f"🚀 TMC is {ratio:.1f}x faster than ChromaDB (mean latency)")
+    else:
+        print(f"ChromaDB is {1/ratio:.1f}x faster than TMC (mean latency)")
+    print("   Note: TMC = HTTP round trip + server-side query embedding;")
+    print("   ChromaDB = in-process vector search on a precomputed embedding.")
+
+
+def print_embedding(embedding: Dict):
+    q = embedding["query"]
+    print("\n🧮 Embedding phase (hash embedding, not included above)")
+    print(f"Bulk: {embedding['bulk_time']:.2f}s ({embedding['bulk_ops_per_sec']:.0f} ops/s)")
+    print(f"Per query (ms): {embedding['query_avg_ms']:.4f} avg over {RETRIEVAL_ITERS} "
+          f"(loop total / iterations)")
+    print(f"Per sample (ms): mean {q['mean']:.4f}  median {q['median']:.4f}  "
+          f"p95 {q['p95']:.4f}  p99 {q['p99']:.4f}")
 
 
 # ================= MAIN =================
@@ -160,21 +239,31 @@ def main():
 
     memories = generate_memories(TOTAL_MEMORIES)
 
+    # Precomputed once, outside the load and query phases
+    embeddings, embedding = embed_memories(memories)
+    query_embeddings = embed_matrix(TEST_QUERIES)
+
     tmc = TMCBenchmark()
     chroma = ChromaBenchmark()
 
     tmc.setup(memories)
-    chroma.setup(memories)
+    chroma.setup(memories, embeddings)
 
     results = {
         "TMC": tmc.benchmark(),
-        "ChromaDB": chroma.benchmark()
+        "ChromaDB": chroma.benchmark(query_embeddings)
     }
 
     print_results(results)
+    if embedding:
+        print_embedding(embedding)
+
+    output = dict(results)
+    if embedding:
+        output["embedding_phase"] = embedding
 
     with open("benchmark_results.json", "w") as f:
-        json.dump(results, f, indent=2)
+        json.dump(output, f, indent=2)
 
     print("\n✅ BENCHMARK COMPLETE")
 
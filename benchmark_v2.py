@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+TMC v2 MULTI-LAYER BENCHMARK
+/v2/crystallize + /v2/retrieve across every retrieval mode
+
+Tests:
+- Load performance (1k, 10k, 100k memories with emotion_vector + metadata,
+  loaded in increments so each size is the true corpus total)
+- Query latency per mode (mean, median, p95, p99)
+- Throughput per mode (queries per second)
+- Server memory growth (RSS after load and after each mode)
+
+Answers: which mode fits a given latency budget, and at which
+corpus size v2 stops being viable for a hot path.
+"""
+
+import time
+import statistics
+import json
+import requests
+from typing import Dict, List, Optional, Tuple
+
+# ============== CONFIG ==============
+
+TMC_BASE_URL = "http://localhost:8000"
+TMC_PROCESS_NAME = "tmc-server"     # used for RSS sampling (needs psutil)
+
+DATASET_SIZES = [1000, 10000, 100000]
+DOCUMENTED_MODES = ["Adaptive", "Emotional"]
+# Guessed from the v2 layer names - only reported once the server proves
+# it honours them (echoes the mode, or ranks differently from Adaptive)
+UNVERIFIED_MODES = ["Semantic", "Temporal", "Content"]
+RETRIEVAL_MODES = DOCUMENTED_MODES + UNVERIFIED_MODES
+QUERY_ITERATIONS = 100
+WARMUP_QUERIES = 5
+K = 10
+
+HOT_PATH_BUDGET_MS = 50.0           # p95 must stay under this to be "viable"
+
+# /stats keys that may hold the number of stored memories
+STATS_COUNT_KEYS = ["total_memories", "memory_count", "total_nodes", "node_count", "count"]
+# Set True when the server was just started and /stats has no count we
+# recognise - silences the "corpus size unverified" warning
+ASSUME_FRESH_SERVER = False
+
+TEST_QUERIES = [
+    "positive work experiences",
+    "I'm feeling overwhelmed with work deadlines",
+    "What happened with the AI project last week?",
+    "Tell me about memory systems",
+    "calm weekend with family",
+]
+
+CATEGORIES = ["work", "personal", "research", "health", "social"]
+
+EMOTIONS = [
+    ([0.8, 0.1, 0.1], "positive"),
+    ([0.1, 0.8, 0.1], "negative"),
+    ([0.2, 0.2, 0.6], "neutral"),
+    ([0.6, 0.3, 0.1], "excited"),
+    ([0.3, 0.6, 0.1], "stressed"),
+]
+
+# ============== DATASET ==============
+
+def generate_dataset(n: int) -> List[Dict]:
+    """Generate v2 payloads: text, importance, emotion_vector, metadata"""
+    dataset = []
+    for i in range(n):
+        emotion, mood = EMOTIONS[i % len(EMOTIONS)]
+        category = CATEGORIES[(i // len(EMOTIONS)) % len(CATEGORIES)]
+        dataset.append({
+            "text": f"Feeling {mood} about {category} memory #{i} in the AI project",
+            "importance": 0.5 + (i % 5) * 0.1,
+            "emotion_vector": emotion,
+            "metadata": {"category": category, "mood": mood, "seq": str(i)},
+        })
+    return dataset
+
+
+# ============== MEMORY SAMPLING ==============
+
+class ServerMemory:
+    """Samples the TMC server's resident memory (RSS) via psutil, if available"""
+
+    def __init__(self):
+        self.process = None
+        try:
+            import psutil
+        except ImportError:
+            print("⚠️  psutil not installed - memory growth will not be reported")
+            print("   Run: pip install psutil")
+            return
+
+        for proc in psutil.process_iter(["name"]):
+            name = proc.info["name"] or ""
+            if name.lower().startswith(TMC_PROCESS_NAME):
+                self.process = proc
+                print(f"✅ Sampling memory of {name} (pid {proc.pid})")
+                return
+        print(f"⚠️  No local '{TMC_PROCESS_NAME}' process found - memory growth will not be reported")
+
+    def rss_mb(self) -> Optional[float]:
+        if self.process is None:
+            return None
+        try:
+            return self.process.memory_info().rss / (1024 * 1024)
+        except Exception:
+            return None
+
+
+# ============== TMC v2 BENCHMARK ==============
+
+class TMCv2Benchmark:
+    def __init__(self, memory: ServerMemory):
+        self.name = "TMC v2"
+        self.session = requests.Session()
+        self.memory = memory
+        self.verified_modes = set(DOCUMENTED_MODES)
+
+    def retrieve(self, query: str, mode: str) -> requests.Response:
+        return self.session.post(
+            f"{TMC_BASE_URL}/v2/retrieve",
+            json={"query": query, "k": K, "mode": mode},
+            timeout=30
+        )
+
+    def verify_mode(self, mode: str) -> bool:
+        """True once the server shows it really distinguishes `mode` from Adaptive"""
+        if mode in self.verified_modes:
+            return True
+
+        for query in TEST_QUERIES:
+            r = self.retrieve(query, mode)
+            if not r.ok:
+                return False
+            body = r.json()
+            echoed = body.get("mode") if isinstance(body, dict) else None
+            if isinstance(echoed, str):
+                if echoed.lower() != mode.lower():
+                    return False
+                break
+            adaptive = self.retrieve(query, "Adaptive")
+            adaptive.raise_for_status()
+            if _ranking(body) != _ranking(adaptive.json()):
+                break
+        else:
+            return False
+
+        self.verified_modes.add(mode)
+        return True
+
+    def server_count(self) -> Optional[int]:
+        """Number of stored memories according to /stats, if it reports one"""
+        try:
+            r = self.session.get(f"{TMC_BASE_URL}/stats", timeout=5)
+            r.raise_for_status()
+            stats = r.json()
+        except Exception:
+            return None
+        if isinstance(stats, dict):
+            for key in STATS_COUNT_KEYS:
+                if isinstance(stats.get(key), int):
+                    return stats[key]
+        return None
+
+    def ensure_empty(self) -> bool:
+        """False only if /stats reports memories left over after /clear"""
+        cleared = False
+        try:
+            cleared = self.session.post(f"{TMC_BASE_URL}/clear", timeout=5).ok
+        except requests.RequestException:
+            pass
+
+        count = self.server_count()
+        if count:
+            print(f"❌ The server still holds {count:,} memories after /clear,")
+            print("   so dataset sizes can't be trusted. Restart the server for an empty corpus.")
+            return False
+        if count is None and not cleared and not ASSUME_FRESH_SERVER:
+            print("⚠️  " + "!" * 70)
+            print("⚠️  /clear is unavailable and /stats reports no memory count, so the")
+            print("⚠️  corpus can't be confirmed empty. Dataset sizes assume a fresh server;")
+            print("⚠️  server_count will be null in the results.")
+            print("⚠️  Set ASSUME_FRESH_SERVER = True to silence this warning.")
+            print("⚠️  " + "!" * 70)
+        return True
+
+    def setup(self, dataset: List[Dict]) -> Dict[str, Optional[float]]:
+        """Add dataset through /v2/crystallize on top of the current corpus"""
+        print(f"\n📝 Loading {len(dataset)} more memories into TMC v2...")
+
+        rss_before = self.memory.rss_mb()
+
+        start = time.time()
+        for payload in dataset:
+            self.session.post(
+                f"{TMC_BASE_URL}/v2/crystallize",
+                json=payload,
+                timeout=5
+            ).raise_for_status()
+
+        load_time = time.time() - start
+        rss_after = self.memory.rss_mb()
+        print(f"✅ Loaded in {load_time:.2f}s ({len(dataset)/load_time:.0f} ops/s)")
+
+        return {
+            "loaded": len(dataset),
+            "load_time": load_time,
+            "ops_per_sec": len(dataset) / load_time if load_time > 0 else 0,
+            "rss_before_mb": rss_before,
+            "rss_after_mb": rss_after,
+            "rss_growth_mb": _delta(rss_before, rss_after),
+        }
+
+    def benchmark_mode(self, mode: str) -> Optional[Dict[str, float]]:
+        """Run queries in one retrieval mode; None if the mode is rejected or unverified"""
+        def retrieve(query: str) -> requests.Response:
+            return self.retrieve(query, mode)
+
+        r = retrieve(TEST_QUERIES[0])
+        if 400 <= r.status_code < 500:
+            print(f"⚠️  Mode '{mode}' rejected by server ({r.status_code}) - skipping")
+            return None
+        r.raise_for_status()
+
+        if not self.verify_mode(mode):
+            print(f"⚠️  Mode '{mode}' is indistinguishable from Adaptive - skipping")
+            return None
+
+        for i in range(WARMUP_QUERIES):
+            retrieve(TEST_QUERIES[i % len(TEST_QUERIES)]).raise_for_status()
+
+        rss_before = self.memory.rss_mb()
+
+        latencies = []
+        start = time.time()
+        for i in range(QUERY_ITERATIONS):
+            query = TEST_QUERIES[i % len(TEST_QUERIES)]
+            t0 = time.time()
+            retrieve(query).raise_for_status()
+            latencies.append((time.time() - t0) * 1000)
+        total_time = time.time() - start
+
+        stats = calculate_stats(latencies)
+        stats["qps"] = QUERY_ITERATIONS / total_time if total_time > 0 else 0
+        stats["rss_growth_mb"] = _delta(rss_before, self.memory.rss_mb())
+        print(f"   {mode:<10} mean {stats['mean']:.2f}ms  p95 {stats['p95']:.2f}ms  "
+              f"{stats['qps']:.0f} q/s")
+        return stats
+
+
+# ============== UTILITIES ==============
+
+def _delta(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if before is None or after is None:
+        return None
+    return after - before
+
+
+def _ranking(body) -> List[str]:
+    """Best-effort list of result identities from a /v2/retrieve response"""
+    items = body
+    if isinstance(body, dict):
+        items = next((v for v in body.values() if isinstance(v, list)), [])
+    if not isinstance(items, list):
+        return []
+    ranking = []
+    for item in items:
+        if isinstance(item, dict):
+            key = item.get("id", item.get("node_id", item.get("text")))
+            ranking.append(str(key) if key is not None else json.dumps(item, sort_keys=True))
+        else:
+            ranking.append(str(item))
+    return ranking
+
+
+def _fmt_mb(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:.1f}"
+
+
+def calculate_stats(latencies: List[float]) -> Dict[str, float]:
+    """Calculate latency statistics"""
+    latencies_sorted = sorted(latencies)
+    return {
+        "mean": statistics.mean(latencies),
+        "median": statistics.median(latencies),
+        "p95": latencies_sorted[int(0.95 * len(latencies_sorted))],
+        "p99": latencies_sorted[int(0.99 * len(latencies_sorted))],
+        "min": min(latencies),
+        "max": max(latencies)
+    }
+
+
+def viability(results: Dict) -> Dict[str, Tuple[Optional[int], Optional[int]]]:
+    """Per mode: (largest size within budget, first size over budget)"""
+    summary = {}
+    for mode in RETRIEVAL_MODES:
+        largest_ok, first_over = None, None
+        for size in sorted(DATASET_SIZES):
+            stats = results.get(size, {}).get("modes", {}).get(mode)
+            if stats is None:
+                continue
+            if stats["p95"] <= HOT_PATH_BUDGET_MS:
+                if first_over is None:
+                    largest_ok = size
+            elif first_over is None:
+                first_over = size
+        summary[mode] = (largest_ok, first_over)
+    return summary
+
+
+def print_results(results: Dict):
+    """Print formatted results"""
+    print("\n" + "=" * 100)
+    print("📊 TMC v2 MULTI-LAYER BENCHMARK RESULTS")
+    print("=" * 100)
+
+    for size in sorted(DATASET_SIZES):
+        if size not in results:
+            continue
+
+        load = results[size]["load"]
+        count = results[size]["server_count"]
+        reported = "n/a" if count is None else f"{count:,}"
+        print(f"\n🔹 Dataset Size: {size:,} memories (server reports {reported})")
+        print("-" * 100)
+
+        print(f"\n📥 Load Performance (/v2/crystallize, +{load['loaded']:,} memories):")
+        print(f"{'Load Time':<15} {'Ops/Second':<15} {'RSS Before(MB)':<16} {'RSS After(MB)':<16} {'Growth(MB)':<12}")
+        print("-" * 80)
+        print(f"{load['load_time']:<15.2f} {load['ops_per_sec']:<15.0f} "
+              f"{_fmt_mb(load['rss_before_mb']):<16} {_fmt_mb(load['rss_after_mb']):<16} "
+              f"{_fmt_mb(load['rss_growth_mb']):<12}")
+
+        print("\n🔍 Query Latency by Mode (ms, /v2/retrieve):")
+        print(f"{'Mode':<12} {'Mean':<10} {'Median':<10} {'P95':<10} {'P99':<10} "
+              f"{'Max':<10} {'QPS':<10} {'RSS +MB':<10}")
+        print("-" * 100)
+        for mode, stats in results[size]["modes"].items():
+            print(f"{mode:<12} {stats['mean']:<10.2f} {stats['median']:<10.2f} "
+                  f"{stats['p95']:<10.2f} {stats['p99']:<10.2f} {stats['max']:<10.2f} "
+                  f"{stats['qps']:<10.0f} {_fmt_mb(stats['rss_growth_mb']):<10}")
+
+    print(f"\n🎯 Hot-Path Viability (p95 <= {HOT_PATH_BUDGET_MS:.0f}ms):")
+    print("-" * 60)
+    for mode, (largest_ok, first_over) in viability(results).items():
+        if largest_ok is None and first_over is None:
+            continue
+        ok = f"up to {largest_ok:,}" if largest_ok else "never"
+        over = f", over budget from {first_over:,}" if first_over else ""
+        print(f"{mode:<12} viable {ok}{over}")
+
+
+# ============== MAIN ==============
+
+def main():
+    print("""
+╔══════════════════════════════════════════════════════════════════════════════════╗
+║     TMC v2 MULTI-LAYER BENCHMARK                                                 ║
+║     /v2/crystallize + /v2/retrieve across retrieval modes                        ║
+╚══════════════════════════════════════════════════════════════════════════════════╝
+""")
+
+    try:
+        r = requests.get(f"{TMC_BASE_URL}/health", timeout=2)
+        r.raise_for_status()
+        print("✅ TMC server is running")
+    except:
+        print("❌ TMC server is not running. Start a v2 build with a license:")
+        print("   TMC_LICENSE_KEY='your-key-here' ./tmc-server")
+        return
+
+    benchmark = TMCv2Benchmark(ServerMemory())
+    if not benchmark.ensure_empty():
+        return
+
+    dataset = generate_dataset(max(DATASET_SIZES))
+    loaded = 0
+
+    # Run benchmarks
+    results = {}
+
+    for size in sorted(DATASET_SIZES):
+        print(f"\n{'='*100}")
+        print(f"🔬 Testing with {size:,} memories")
+        print(f"{'='*100}")
+
+        # Top up the corpus from the previous size instead of reloading it
+        try:
+            load = benchmark.setup(dataset[loaded:size])
+        except Exception as e:
+            print(f"❌ Loading failed: {e}")
+            import traceback
+            traceback.print_exc()
+            break
+        loaded = size
+
+        count = benchmark.server_count()
+        if count is not None and count != size:
+            print(f"⚠️  Server reports {count:,} memories, expected {size:,}")
+
+        results[size] = {"server_count": count, "load": load, "modes": {}}
+
+        print(f"\n🧪 Querying {len(RETRIEVAL_MODES)} modes ({QUERY_ITERATIONS} queries each)...")
+        for mode in RETRIEVAL_MODES:
+            try:
+                stats = benchmark.benchmark_mode(mode)
+                if stats is not None:
+                    results[size]["modes"][mode] = stats
+            except Exception as e:
+                print(f"❌ Mode {mode} failed: {e}")
+
+    # Print results
+    print_results(results)
+
+    # Save to file
+    output_file = "benchmark_v2_results.json"
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to: {output_file}")
+
+    print("\n✅ BENCHMARK COMPLETE!")
+
+
+if __name__ == "__main__":
+    main()